@@ -11,14 +11,18 @@ Usage:
   python generate_synth_data.py --rules rule_to_observe.xlsx --profiles 1000 --avg_txn 15 --seed 42 --outdir output
 
 """
-import argparse, os, string
-from datetime import datetime, timedelta, timezone
+import argparse, csv, os, string
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 import pandas as pd
 import numpy as np
 
 def read_rules(xlsx_path: str):
+    # Only these sheets feed the rules; skipping the rest avoids paying the
+    # openpyxl parse cost for requirement/profile_tbl/transaction_tbl.
+    wanted = {"occu", "state"}
     with pd.ExcelFile(xlsx_path) as xls:
-        sheets = {name: xls.parse(sheet_name=name) for name in xls.sheet_names}
+        sheets = {name: xls.parse(sheet_name=name) for name in xls.sheet_names if name in wanted}
     # Extract occupation list
     occu = []
     if "occu" in sheets:
@@ -27,7 +31,9 @@ def read_rules(xlsx_path: str):
             occu += [str(v).strip() for v in occu_df[col].dropna().tolist() if str(v).strip()]
         occu = [o for o in occu if o.lower() != 'nan']
         # Preserve the first occurrence order while removing duplicates to keep RNG sampling stable.
-        occu = list(dict.fromkeys(occu))
+        # Upper-case here so the conversion happens once per run, not once per shard; it must run
+        # before de-duplication so entries differing only in case collapse to one category.
+        occu = list(dict.fromkeys(o.upper() for o in occu))
     # Extract states
     states = []
     if "state" in sheets:
@@ -50,75 +56,106 @@ def read_rules(xlsx_path: str):
         "channels": channels
     }
 
-_ALPHABET = np.array(list(string.ascii_uppercase + string.ascii_lowercase + string.digits))
+# Alphabet as single bytes so a 2-D index can collapse straight into fixed-width strings.
+_ALPHABET_BYTES = np.frombuffer((string.ascii_uppercase + string.ascii_lowercase + string.digits).encode(), dtype="S1")
 
 
-def rand_alnum(n, rng: np.random.Generator):
-    idx = rng.integers(0, len(_ALPHABET), size=n)
-    return ''.join(_ALPHABET[idx])
+def rand_alnum_batch(n_rows, width, rng: np.random.Generator):
+    """Draw n_rows random alphanumeric strings of the given width in one shot.
 
+    One (n_rows, width) integer draw indexes the byte alphabet, and viewing the
+    resulting C-contiguous char matrix as fixed-width bytestrings collapses each
+    row into a string without any per-row RNG call or Python join.
+    """
+    idx = rng.integers(0, len(_ALPHABET_BYTES), size=(n_rows, width), dtype=np.uint8)
+    chars = _ALPHABET_BYTES[idx]
+    return chars.view(f"S{width}").ravel().astype(str)
 
-def make_customer_id(rng: np.random.Generator):
-    suffix_len = max(1, 10 - len("CUST_"))
-    return "CUST_" + rand_alnum(suffix_len, rng)
 
+def redraw_duplicates(ids, width, rng: np.random.Generator, prefix=""):
+    """Redraw duplicate entries of an ID array in place until all are distinct.
 
-def make_account_id(rng: np.random.Generator):
-    suffix_len = max(1, 12 - len("CACC_"))
-    return "CACC_" + rand_alnum(suffix_len, rng)
+    Collisions are rare at these widths, so locate duplicates with np.unique
+    and redraw only those few slots until the array is clean.
+    """
+    n_rows = len(ids)
+    _, first = np.unique(ids, return_index=True)
+    if len(first) == n_rows:
+        return ids
+    dup = np.ones(n_rows, dtype=bool)
+    dup[first] = False
+    # Re-verify only the redrawn slots: accepted values join the taken pool and the
+    # pending set shrinks each pass, so the full array is never re-sorted.
+    taken = ids[~dup]
+    pending = np.flatnonzero(dup)
+    while pending.size:
+        fresh = np.char.add(prefix, rand_alnum_batch(pending.size, width, rng))
+        _, keep = np.unique(fresh, return_index=True)
+        ok = np.zeros(pending.size, dtype=bool)
+        ok[keep] = True
+        ok &= ~np.isin(fresh, taken)
+        ids[pending[ok]] = fresh[ok]
+        taken = np.concatenate([taken, fresh[ok]])
+        pending = pending[~ok]
+    return ids
 
 
-def make_txn_id(rng: np.random.Generator):
-    suffix_len = max(1, 15 - len("TXN_"))
-    return "TXN_" + rand_alnum(suffix_len, rng)
+def unique_alnum_batch(n_rows, width, rng: np.random.Generator, prefix=""):
+    """Draw n_rows distinct prefixed alphanumeric IDs in one batch."""
+    ids = np.char.add(prefix, rand_alnum_batch(n_rows, width, rng))
+    return redraw_duplicates(ids, width, rng, prefix=prefix)
 
-def random_timestamp_utc(start_dt, end_dt, rng: np.random.Generator):
+
+def random_timestamps_utc(start_dt, end_dt, size, rng: np.random.Generator):
     # Use integer seconds so we can deterministically sample uniform timestamps between the provided bounds.
     delta = int((end_dt - start_dt).total_seconds())
+    start64 = np.datetime64(start_dt.replace(tzinfo=None), "s")
     if delta <= 0:
-        return start_dt.isoformat().replace("+00:00","Z")
-    # Draw from an inclusive range so the end datetime remains reachable when delta is non-zero.
-    sec = int(rng.integers(0, delta + 1))
-    ts = start_dt + timedelta(seconds=sec)
-    return ts.isoformat().replace("+00:00","Z")
+        offsets = np.zeros(size, dtype=np.int64)
+    else:
+        # Draw from an inclusive range so the end datetime remains reachable when delta is non-zero.
+        offsets = rng.integers(0, delta + 1, size=size, dtype=np.int64)
+    ts = start64 + offsets.astype("timedelta64[s]")
+    # datetime64[s] renders as 'YYYY-MM-DDTHH:MM:SS'; appending 'Z' restores the UTC marker.
+    return np.char.add(ts.astype("U19"), "Z")
+
+def sample_categorical(values, size, rng: np.random.Generator):
+    """Sample uniformly from values, returning a pandas Categorical.
+
+    Drawing integer codes and wrapping them with from_codes keeps the column as
+    per-row codes plus one category table instead of repeated object strings.
+    """
+    return pd.Categorical.from_codes(rng.integers(0, len(values), size=size), categories=values)
+
+
+ACCOUNT_TYPES = ["CA", "SA"]
+TXN_TYPES = ["credit", "debit"]
+
 
 def generate_profiles(n_customers, rules, rng: np.random.Generator):
+    n = n_customers
     occu = rules["occu"]
     states = rules["states"]
-    profiles = []
-    # Track seen identifiers so every generated profile row remains unique even under repeated RNG draws.
-    used_cust = set()
-    used_acc = set()
-    for _ in range(n_customers):
-        cid = make_customer_id(rng)
-        while cid in used_cust:
-            cid = make_customer_id(rng)
-        used_cust.add(cid)
-
-        acc = make_account_id(rng)
-        while acc in used_acc:
-            acc = make_account_id(rng)
-        used_acc.add(acc)
-        
-        # Ages and other numerics pull directly from the rng so seeding reproduces the same distribution.
-        age = int(rng.integers(10, 100))  # 10-99 inclusive
-        occupation = str(rng.choice(occu)).upper()
-        state = str(rng.choice(states))
-        tenure = int(rng.integers(5, 241))  # 5-240 inclusive
-        acct_type = str(rng.choice(["CA", "SA"]))
-        avg_bal = float(np.round(rng.uniform(100, 1_000_000), 2))
-        
-        profiles.append({
-            "Customer_ID": cid,
-            "Customer_Acc": acc,
-            "Age": age,
-            "Stated_Occupation": occupation,
-            "Location_State": state,
-            "Account_Tenure_Months": tenure,
-            "Account_Type": acct_type,
-            "Avg_Balance": avg_bal,
-        })
-    return pd.DataFrame(profiles)
+
+    # Identifiers come from one batched draw each; unique_alnum_batch redraws the
+    # rare collision after the fact instead of probing a set per row.
+    cust_ids = unique_alnum_batch(n, max(1, 10 - len("CUST_")), rng, prefix="CUST_")
+    accs = unique_alnum_batch(n, max(1, 12 - len("CACC_")), rng, prefix="CACC_")
+
+    # Every remaining column is a single batched draw so seeding reproduces the same distribution
+    # without N round-trips into the RNG.
+    return pd.DataFrame({
+        "Customer_ID": cust_ids,
+        "Customer_Acc": accs,
+        # Small integer dtypes keep the buffers compact; both ranges fit int16
+        # with plenty of headroom.
+        "Age": rng.integers(10, 100, size=n, dtype=np.int16),  # 10-99 inclusive
+        "Stated_Occupation": sample_categorical(occu, n, rng),
+        "Location_State": sample_categorical(states, n, rng),
+        "Account_Tenure_Months": rng.integers(5, 241, size=n, dtype=np.int16),  # 5-240 inclusive
+        "Account_Type": sample_categorical(ACCOUNT_TYPES, n, rng),
+        "Avg_Balance": np.round(rng.uniform(100, 1_000_000, size=n), 2),
+    })
 
 FIRST_NAMES = [
     "Adam", "Aisha", "Daniel", "Hana", "Irfan", "Nurul", "Zara",
@@ -136,45 +173,141 @@ LAST_NAMES = [
 COMPANY_PREFIXES = ["Kedai", "Restoran", "Warung", "Syarikat", "Perusahaan", "Bengkel", "Online"]
 COMPANY_SUFFIXES = ["Maju", "Jaya", "Sentosa", "Makmur", "Bestari", "Hebat", "Sejahtera", "Baroena"]
 
+# Array views of the name pools, built once so sampling is a plain integer index
+# instead of a per-call list-to-array conversion inside rng.choice.
+_FIRST_NAMES_ARR = np.array(FIRST_NAMES)
+_LAST_NAMES_ARR = np.array(LAST_NAMES)
+_COMPANY_PREFIXES_ARR = np.array(COMPANY_PREFIXES)
+_COMPANY_SUFFIXES_ARR = np.array(COMPANY_SUFFIXES)
+
 
 def generate_txns(profile_df, avg_txn, rules, rng: np.random.Generator):
     channels = rules["channels"]
     start_dt = rules["txn_start"]
     end_dt = rules["txn_end"]
-    txns = []
     # Guard the Poisson lambda so we always generate at least one transaction per customer.
     lam = max(1, avg_txn)
-    for _, row in profile_df.iterrows():
-        n_txn = max(1, int(rng.poisson(lam)))
-        acc = row["Customer_Acc"]
-        for _ in range(n_txn):
-            txn_id = make_txn_id(rng)
-            ts = random_timestamp_utc(start_dt, end_dt, rng)
-            amount = float(np.round(rng.uniform(100, 1_000_000), 2))
-            ttype = str(rng.choice(["credit", "debit"]))
-            channel = str(rng.choice(channels))
-
-            # Randomly pick Malaysian-like personal or company names
-            # Bias towards personal names to mimic the majority of retail payments.
-            if rng.random() < 0.8:
-                cp_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
-            else:
-                company_prefix = rng.choice(COMPANY_PREFIXES)
-                company_suffix = rng.choice(COMPANY_SUFFIXES)
-                cp_name = f"{company_prefix} {company_suffix}"
-
-            cp_acc = make_account_id(rng)
-            txns.append({
-                "Customer_Acc": acc,
-                "Transaction_ID": txn_id,
-                "Timestamp": ts,
-                "Amount": amount,
-                "Type": ttype,
-                "Channel": channel,
-                "Counterparty_Name": cp_name,
-                "Counterparty_Account": cp_acc
-            })
-    return pd.DataFrame(txns)
+    # One batched count draw sizes the whole output up front; np.repeat then expands
+    # each parent account to its transaction rows without touching iterrows().
+    n_txns = np.maximum(1, rng.poisson(lam, size=len(profile_df)))
+    total = int(n_txns.sum())
+    acc_col = np.repeat(profile_df["Customer_Acc"].to_numpy(), n_txns)
+
+    txn_ids = unique_alnum_batch(total, max(1, 15 - len("TXN_")), rng, prefix="TXN_")
+    timestamps = random_timestamps_utc(start_dt, end_dt, total, rng)
+    amounts = np.round(rng.uniform(100, 1_000_000, size=total), 2)
+    types = sample_categorical(TXN_TYPES, total, rng)
+    channel_col = sample_categorical(channels, total, rng)
+
+    # Randomly pick Malaysian-like personal or company names
+    # Bias towards personal names to mimic the majority of retail payments;
+    # both variants are drawn for every row and np.where keeps the winner.
+    is_person = rng.random(total) < 0.8
+    first_col = _FIRST_NAMES_ARR[rng.integers(0, len(_FIRST_NAMES_ARR), size=total)]
+    last_col = _LAST_NAMES_ARR[rng.integers(0, len(_LAST_NAMES_ARR), size=total)]
+    person = np.char.add(np.char.add(first_col, " "), last_col)
+    prefix_col = _COMPANY_PREFIXES_ARR[rng.integers(0, len(_COMPANY_PREFIXES_ARR), size=total)]
+    suffix_col = _COMPANY_SUFFIXES_ARR[rng.integers(0, len(_COMPANY_SUFFIXES_ARR), size=total)]
+    company = np.char.add(np.char.add(prefix_col, " "), suffix_col)
+    cp_names = np.where(is_person, person, company)
+    cp_accs = np.char.add("CACC_", rand_alnum_batch(total, max(1, 12 - len("CACC_")), rng))
+
+    return pd.DataFrame({
+        "Customer_Acc": acc_col,
+        "Transaction_ID": txn_ids,
+        "Timestamp": timestamps,
+        "Amount": amounts,
+        "Type": types,
+        "Channel": channel_col,
+        "Counterparty_Name": cp_names,
+        "Counterparty_Account": cp_accs,
+    })
+
+def _profile_shard(n_customers, rules, seed_seq):
+    return generate_profiles(n_customers, rules, np.random.default_rng(seed_seq))
+
+
+def _txn_shard(profile_df, avg_txn, rules, seed_seq):
+    return generate_txns(profile_df, avg_txn, rules, np.random.default_rng(seed_seq))
+
+
+def generate_dataset(n_customers, avg_txn, rules, seed, workers=0):
+    """Generate profiles and transactions, sharded across worker processes.
+
+    Customers split into one shard per worker, each driven by an independent
+    SeedSequence child so results are reproducible for a given seed and worker
+    count. Profile IDs are deduplicated across shards before transactions are
+    generated, keeping the account linkage intact.
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, n_customers))
+    shard_sizes = [len(s) for s in np.array_split(np.arange(n_customers), workers)]
+    seed_seq = np.random.SeedSequence(seed)
+    # One child per shard for profiles, one per shard for transactions, plus one
+    # reserved for the cross-shard duplicate redraws.
+    children = seed_seq.spawn(2 * workers + 1)
+    prof_seeds, txn_seeds, dedup_seed = children[:workers], children[workers:2 * workers], children[-1]
+    dedup_rng = np.random.default_rng(dedup_seed)
+
+    if workers == 1:
+        profile_df = _profile_shard(shard_sizes[0], rules, prof_seeds[0])
+        txn_df = _txn_shard(profile_df, avg_txn, rules, txn_seeds[0])
+        return profile_df, txn_df
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        profile_parts = list(pool.map(_profile_shard, shard_sizes, [rules] * workers, prof_seeds))
+        profile_df = pd.concat(profile_parts, ignore_index=True)
+        # Per-shard batches are unique internally; patch the rare cross-shard
+        # collision before transactions reference Customer_Acc.
+        for col, width, prefix in (("Customer_ID", 5, "CUST_"), ("Customer_Acc", 7, "CACC_")):
+            profile_df[col] = redraw_duplicates(profile_df[col].to_numpy(), width, dedup_rng, prefix=prefix)
+        bounds = np.cumsum(shard_sizes)
+        profile_parts = [profile_df.iloc[start:end] for start, end in zip(bounds - shard_sizes, bounds)]
+
+        txn_parts = list(pool.map(_txn_shard, profile_parts, [avg_txn] * workers, [rules] * workers, txn_seeds))
+    txn_df = pd.concat(txn_parts, ignore_index=True)
+    txn_df["Transaction_ID"] = redraw_duplicates(txn_df["Transaction_ID"].to_numpy(), 11, dedup_rng, prefix="TXN_")
+    return profile_df, txn_df
+
+
+def write_csv(df, path, chunk_rows=65536):
+    """Stream a DataFrame to CSV in fixed-size row chunks.
+
+    When pyarrow is installed the columns go straight to Arrow's multithreaded
+    C++ CSV writer; otherwise the column arrays are zipped through csv.writer
+    on a large-buffered handle. Either way formatting happens per batch, never
+    for the whole frame at once.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        pa = None
+    if pa is not None:
+        opts = pacsv.WriteOptions(batch_size=chunk_rows, quoting_style="needed")
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path, write_options=opts)
+        return
+    cols = [df[c].to_numpy() for c in df.columns]
+    with open(path, "w", buffering=1 << 20, newline="") as f:
+        w = csv.writer(f)
+        w.writerow(df.columns)
+        for start in range(0, len(df), chunk_rows):
+            w.writerows(zip(*(col[start:start + chunk_rows] for col in cols)))
+
+
+def write_parquet(df, path):
+    """Write a DataFrame to zstd-compressed Parquet via pyarrow.
+
+    Columnar encoding skips the per-cell string formatting CSV pays for, so
+    writes are several times faster and the files far smaller at large N.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise SystemExit("--format parquet requires the pyarrow package (pip install pyarrow)") from exc
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, compression="zstd")
+
 
 def main():
     parser = argparse.ArgumentParser()
@@ -183,22 +316,25 @@ def main():
     parser.add_argument("--avg_txn", type=int, default=15, help="Average number of transactions per customer (Poisson)")
     parser.add_argument("--seed", type=int, default=42, help="Random seed")
     parser.add_argument("--outdir", default="output", help="Output directory")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Worker processes for generation (0 = one per CPU); output is reproducible per seed and worker count")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="Output format: csv (default) or parquet (needs pyarrow; faster writes, smaller files)")
     args = parser.parse_args()
-    
-    # Centralise randomness through numpy's Generator so every downstream helper respects the --seed flag.
-    rng = np.random.default_rng(args.seed)
+
+    # Randomness flows through SeedSequence children so every shard respects the --seed flag.
     rules = read_rules(args.rules)
     os.makedirs(args.outdir, exist_ok=True)
 
-    profile_df = generate_profiles(args.profiles, rules, rng)
-    txn_df = generate_txns(profile_df, args.avg_txn, rules, rng)
+    profile_df, txn_df = generate_dataset(args.profiles, args.avg_txn, rules, args.seed, workers=args.workers)
     
     today = datetime.utcnow().strftime("%Y%m%d")
-    profile_path = os.path.join(args.outdir, f"CUSTOMER_PROFILE_{today}.csv")
-    txn_path = os.path.join(args.outdir, f"CUSTOMER_TXN_{today}.csv")
-    
-    profile_df.to_csv(profile_path, index=False)
-    txn_df.to_csv(txn_path, index=False)
+    writer = write_parquet if args.format == "parquet" else write_csv
+    profile_path = os.path.join(args.outdir, f"CUSTOMER_PROFILE_{today}.{args.format}")
+    txn_path = os.path.join(args.outdir, f"CUSTOMER_TXN_{today}.{args.format}")
+
+    writer(profile_df, profile_path)
+    writer(txn_df, txn_path)
     
     print(f"Generated {len(profile_df)} profiles -> {profile_path}")
     print(f"Generated {len(txn_df)} transactions -> {txn_path}")